@@ -2,13 +2,115 @@ import _snowflake
 import json
 import time
 import streamlit as st
+import numpy as np
 import pandas as pd
 from snowflake.snowpark.context import get_active_session
 from snowflake.snowpark import Session, FileOperation
+import copy
 import io
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import re 
+import re
+
+# Strips anything that is not a letter or digit from generated descriptions
+_NON_ALNUM_RE = re.compile(r'[^A-Za-z0-9]+')
+
+# Prefer the libyaml C emitter when it is available; it is ~10x faster than the pure-Python one
+_YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Resolve the active Snowpark session once instead of on every function entry
+@st.cache_resource(show_spinner=False)
+def _session():
+    return get_active_session()
+
+# Skeleton YAML structure shown before any table is added; dumped once at import
+_YAML_TEMPLATE = {
+    "name": "<name>",
+    "description": "<string>",
+    "tables": [
+        {
+            "name": "<name>",
+            "description": "<string>",
+            "base_table": {
+                "database": "<database>",
+                "schema": "<schema>",
+                "table": "<base table name>"
+            },
+            "dimensions": [
+                {
+                    "name": "<name>",
+                    "synonyms": ["<array of strings>"],
+                    "description": "<string>",
+                    "expr": "<SQL expression>",
+                    "data_type": "<data type>"
+             #       "unique": False
+                  #  "sample_values": ["<array of strings>"]
+                }
+            ],
+            "time_dimensions": [
+                {
+                    "name": "date",
+                    "synonyms": ["<array of strings>"],
+                    "description": "<string>",
+                    "expr": "date",
+                    "data_type": "date"
+           #         "unique": True
+                }
+            ],
+            "measures": [
+                {
+                    "name": "<name>",
+                    "synonyms": ["<array of strings>"],
+                    "description": "<string>",
+                    "expr": "<SQL expression>",
+                    "data_type": "<data type>",
+                    "default_aggregation": "<aggregate function>"
+                }
+            ],
+            "filters": [
+                {
+                    "name": "<name>",
+                    "synonyms": ["<array of strings>"],
+                    "description": "<string>",
+                    "expr": "<SQL expression>"
+                }
+            ]
+        }
+    ]
+}
+
+_YAML_TEMPLATE_STR = yaml.dump(_YAML_TEMPLATE, Dumper=_YAML_DUMPER, sort_keys=False, indent=2, width=900)
+
+# Data type groups used to classify columns into the YAML sections.
+# VARCHAR(n) is matched by prefix rather than enumerating lengths.
+TIME_DIMENSION_TYPES = frozenset(["DATE", "DATETIME", "TIME", "TIMESTAMP", "TIMESTAMP_LTZ(9)", "TIMESTAMP_NTZ", "TIMESTAMP_TZ"])
+DIMENSION_TYPES = frozenset(["CHAR", "CHARACTER", "STRING", "TEXT", "BINARY", "VARBINARY"])
+MEASURE_TYPES = frozenset(["NUMBER", "DECIMAL", "NUMERIC", "INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "BYTEINT", "FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "DOUBLE PRECISION", "REAL"])
+
+# Caps on how much of a query result is materialized and charted in the chat
+MAX_RESULT_ROWS = 50000
+CHART_ROW_LIMIT = 10000
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_sql_result(statement: str):
+    """Fetches a query result in Arrow batches, stopping at MAX_RESULT_ROWS.
+
+    Cached per statement so replaying the chat history does not re-run
+    every prior message's SQL on each rerun.
+    """
+    session = _session()
+    batches = []
+    fetched_rows = 0
+    truncated = False
+    for batch in session.sql(statement).to_pandas_batches():
+        batches.append(batch)
+        fetched_rows += len(batch)
+        if fetched_rows >= MAX_RESULT_ROWS:
+            truncated = True
+            break
+    df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+    return df.head(MAX_RESULT_ROWS), truncated
 
 def send_message(prompt: str) -> dict:
     """Calls the REST API and returns the response."""
@@ -73,21 +175,23 @@ def display_content(content: list, message_index: int = None) -> None:
                 st.code(item["statement"], language="sql")
             with st.expander("Results", expanded=True):
                 with st.spinner("Running SQL..."):
-                    session = get_active_session()
-                    df = session.sql(item["statement"]).to_pandas()
-                    if len(df.index) > 1:
+                    df, truncated = fetch_sql_result(item["statement"])
+                    if truncated:
+                        st.caption(f"Showing the first {MAX_RESULT_ROWS:,} rows.")
+                    n_rows, n_cols = df.shape
+                    if n_rows > 1:
                         data_tab, line_tab, bar_tab, area_chart = st.tabs(
                             ["Data", "Line Chart", "Bar Chart", "Area Chart"]
                         )
                         data_tab.dataframe(df)
-                        if len(df.columns) > 1:
-                            df = df.set_index(df.columns[0])
+                        chart_df = df.set_index(df.columns[0]) if n_cols > 1 else df
+                        chart_df = chart_df.head(CHART_ROW_LIMIT)
                         with line_tab:
-                            st.line_chart(df)
+                            st.line_chart(chart_df)
                         with bar_tab:
-                            st.bar_chart(df)
+                            st.bar_chart(chart_df)
                         with area_chart:
-                            st.area_chart(df)
+                            st.area_chart(chart_df)
                     else:
                         st.dataframe(df)
                         
@@ -115,71 +219,67 @@ def show_cortex_analyst_page():
 
 # Upload semantic model file to stage 
 
-def upload_to_stage(db_name, schema_name, yaml_bytes, stage_name):
-    session = get_active_session()
+def upload_to_stage(db_name, schema_name, stage_name):
+    session = _session()
     semantic_file_name = db_name+'.'+ schema_name+'.'+stage_name+'/'+st.session_state['semantic_name']+'_semantic_model_'+datetime.now().strftime("%Y%m%d%H%M")+'.yaml'
-    FileOperation(session).put_stream(input_stream=yaml_bytes, stage_location='@'+semantic_file_name, auto_compress=False)
+    yaml_stream = io.BytesIO(st.session_state.get('yaml_bytes', b''))
+    FileOperation(session).put_stream(input_stream=yaml_stream, stage_location='@'+semantic_file_name, auto_compress=False)
     st.session_state['semantic_file_name'] = semantic_file_name
     
-# Function to get MIN/MAX of a column 
+# Function to get MIN/MAX of all columns in one table scan
 
-def min_max_column(database_name, schema_name, table_name, column): 
-    session = get_active_session()
+def min_max_all(database_name, schema_name, table_name, columns):
+    session = _session()
 
-    table_definition_df = session.sql(f"SELECT MIN({column})::TEXT AS MIN, MAX({column})::TEXT as MAX FROM {database_name}.{schema_name}.{table_name}").collect()
+    projections = ", ".join(f'MIN("{column}")::TEXT AS MIN_{i}, MAX("{column}")::TEXT AS MAX_{i}' for i, column in enumerate(columns))
+    min_max_row = session.sql(f"SELECT {projections} FROM {database_name}.{schema_name}.{table_name}").collect()[0]
 
-    return table_definition_df[0]['MIN'], table_definition_df[0]['MAX']
+    return [(min_max_row[f'MIN_{i}'], min_max_row[f'MAX_{i}']) for i in range(len(columns))]
     
-# Function to Generate Column description using Cortex LLM (Complete)
+# Function to Generate all column descriptions in one Cortex LLM (Complete) call
+# Cached so re-adding the same table does not pay for the LLM call again
 
-def generate_column_description(database_name, schema_name, table_name, columns, column_name, column_details):
-    session = get_active_session()
+@st.cache_data(ttl=24*3600, show_spinner=False)
+def generate_all_column_descriptions(database_name, schema_name, table_name, column_details_json):
+    session = _session()
 
     # Create the prompt
     prompt = f"""
-    Please provide a concise business description for the column in two phrases or less. Do not mention the column name, its type, whether it is unique or nullable, where it is stored, or any other technical details. I only need the business description. Do not include any special characters or additional information beyond the business description.
-    
-    The column name is: {column_name}
-    It is stored in the {table_name} table, which is in the {schema_name} schema, in the {database_name} database.
-    Other columns in the same table are: {columns}
-    
-    Use the following information to enhance the description:
-    {column_details}
-    
-    Focus solely on the business purpose and usage of the column in queries. Avoid any mention of technical attributes such as nullability, data type, or storage location.
+    Please provide a concise business description for every column of the table, each in two phrases or less. Do not mention the column names, their types, whether they are unique or nullable, where they are stored, or any other technical details. I only need the business descriptions. Do not include any special characters or additional information beyond the business descriptions.
+
+    The table name is: {table_name}
+    It is stored in the {schema_name} schema, in the {database_name} database.
+
+    Here are the details of every column in the table:
+    {column_details_json}
+
+    Focus solely on the business purpose and usage of each column in queries. Avoid any mention of technical attributes such as nullability, data type, or storage location.
     Do not include any introductory phrases.
-    
+
+    Return ONLY a JSON array with one entry per column, in the form:
+    [{{"name": "<column name>", "description": "<business description>"}}]
+
     Example:
-    For a column named "COGS" in the "DAILY_REVENUE" table, which is in the "REVENUE_TIMESERIES" schema, in the "CORTEX_ANALYST_DEMO" database, with the following details:
-    {{
-        "NAME": "COGS",
-        "TYPE": "FLOAT",
-        "KIND": "COLUMN",
-        "null?": "Y",
-        "DEFAULT": None,
-        "primary key": "N",
-        "unique key": "N",
-        "CHECK": None,
-        "EXPRESSION": None,
-        "COMMENT": None,
-        "policy name": None,
-        "privacy domain": None
-    }}
-    The good description might be:
-    "Represents the cost of goods sold"
-    The bad description would be: 
-    "Here is a concise business description for the COGS column Represents the cost of goods sold"
+    For a column named "COGS" in the "DAILY_REVENUE" table, the good entry might be:
+    {{"name": "COGS", "description": "Represents the cost of goods sold"}}
+    The bad entry would be:
+    {{"name": "COGS", "description": "Here is a concise business description for the COGS column Represents the cost of goods sold"}}
     """
 
-    # Create the SQL query
-    query = f"""SELECT SNOWFLAKE.CORTEX.COMPLETE('llama3-70b', '{prompt.replace("'", "''")}') as response;"""
-    
-    generated_description = session.sql(query).collect()
-    
-    return re.sub('[^A-Za-z0-9]+', ' ', generated_description[0]['RESPONSE']).replace('"', "").strip().replace('\n', ' ')
+    # Execute the query with the prompt as a bound parameter
+    generated_descriptions = session.sql("SELECT SNOWFLAKE.CORTEX.COMPLETE('llama3-70b', ?) AS RESPONSE", params=[prompt]).collect()
 
-def generate_table_description(database_name, schema_name, table_name, column_details):
-    session = get_active_session()
+    # Keep only the JSON array in case the model wraps it in extra text.
+    # Parse failures propagate so st.cache_data never caches a bad response;
+    # the caller handles them per attempt.
+    response = generated_descriptions[0]['RESPONSE']
+    response = response[response.index('['):response.rindex(']') + 1]
+
+    return {entry['name']: _NON_ALNUM_RE.sub(' ', entry['description']).strip() for entry in json.loads(response)}
+
+@st.cache_data(ttl=24*3600, show_spinner=False)
+def generate_table_description(database_name, schema_name, table_name, column_details_json):
+    session = _session()
 
     # Create the prompt
     prompt = f"""
@@ -188,19 +288,15 @@ def generate_table_description(database_name, schema_name, table_name, column_de
     The table name is: {table_name}
     It is stored in the {schema_name} schema, in the {database_name} database.
     Here are the column descriptions of the table:
-    {column_details}
+    {column_details_json}
     Focus on the business purpose and usage of the table.
     Focus solely on the business purpose and usage of the table. 
     Do not include any introductory phrases.
     """
     
-    # Create the SQL query
-    query = f"""SELECT SNOWFLAKE.CORTEX.COMPLETE('llama3-70b', '{prompt.replace("'", "''")}') as response;"""
-
-    # Debug: Print the query
-    # Execute the query
-    generated_description = session.sql(query).collect()
-    return re.sub('[^A-Za-z0-9]+', ' ', generated_description[0]['RESPONSE']).replace('"', "").strip().replace('\n', ' ')
+    # Execute the query with the prompt as a bound parameter
+    generated_description = session.sql("SELECT SNOWFLAKE.CORTEX.COMPLETE('llama3-70b', ?) AS RESPONSE", params=[prompt]).collect()
+    return _NON_ALNUM_RE.sub(' ', generated_description[0]['RESPONSE']).strip()
 
 
 # Function to show the welcome page
@@ -264,106 +360,71 @@ def show_get_started_page():
         st.success("Semantic Model info saved successfully! Click on Table Definition on the navigation menu to finish YAML file creation")
         st.experimental_set_query_params(page="Table Definition")
 
+# Metadata lookups, memoized so every widget interaction does not re-run the SHOW queries.
+# Each one is keyed on its parent identifiers, so picking a new database only refreshes downstream lookups.
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_databases():
+    return [row['name'] for row in _session().sql("SHOW DATABASES").collect()]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_schemas(database_name):
+    return [row['name'] for row in _session().sql(f"SHOW SCHEMAS IN DATABASE {database_name}").collect()]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_tables(database_name, schema_name):
+    return [row['name'] for row in _session().sql(f"SHOW TABLES IN {database_name}.{schema_name}").collect()]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def list_stages(database_name, schema_name):
+    return [row['name'] for row in _session().sql(f"SHOW STAGES IN {database_name}.{schema_name}").collect()]
+
 # Function to show the table definition page
 def show_table_definition_page():
-    session = get_active_session()
+    session = _session()
 
     # Show databases and create a select box for the database selection
-    databases_df = session.sql("SHOW DATABASES").collect()
-    databases = [row['name'] for row in databases_df]
-    database_selector = st.selectbox("Select Database", databases)
+    database_selector = st.selectbox("Select Database", list_databases())
 
     # Show schemas based on the selected database and create a select box for schema selection
-    schemas_df = session.sql(f"SHOW SCHEMAS IN DATABASE {database_selector}").collect()
-    schemas = [row['name'] for row in schemas_df]
-    schema_selector = st.selectbox("Select Schema", schemas)
+    schema_selector = st.selectbox("Select Schema", list_schemas(database_selector))
 
     # Show tables based on the selected schema and create a select box for table selection
-    tables_df = session.sql(f"SHOW TABLES IN {database_selector}.{schema_selector}").collect()
-    tables = [row['name'] for row in tables_df]
-    table_selector = st.selectbox("Select Table", tables)
+    table_selector = st.selectbox("Select Table", list_tables(database_selector, schema_selector))
 
     # Show stages based on the selected database / schema and create a select box for stage selection
-    stages_df = session.sql(f"SHOW STAGES IN {database_selector}.{schema_selector}").collect()
-    stages = [row['name'] for row in stages_df]
-    stage_selector = st.selectbox("Select Stage", stages)
-    
-    # Display the current YAML structure
-    yaml_template = {
-        "name": "<name>",
-        "description": "<string>",
-        "tables": [
-            {
-                "name": "<name>",
-                "description": "<string>",
-                "base_table": {
-                    "database": "<database>",
-                    "schema": "<schema>",
-                    "table": "<base table name>"
-                },
-                "dimensions": [
-                    {
-                        "name": "<name>",
-                        "synonyms": ["<array of strings>"],
-                        "description": "<string>",
-                        "expr": "<SQL expression>",
-                        "data_type": "<data type>"
-                 #       "unique": False
-                      #  "sample_values": ["<array of strings>"]
-                    }
-                ],
-                "time_dimensions": [
-                    {
-                        "name": "date",
-                        "synonyms": ["<array of strings>"],
-                        "description": "<string>",
-                        "expr": "date",
-                        "data_type": "date"
-               #         "unique": True
-                    }
-                ],
-                "measures": [
-                    {
-                        "name": "<name>",
-                        "synonyms": ["<array of strings>"],
-                        "description": "<string>",
-                        "expr": "<SQL expression>",
-                        "data_type": "<data type>",
-                        "default_aggregation": "<aggregate function>"
-                    }
-                ],
-                "filters": [
-                    {
-                        "name": "<name>",
-                        "synonyms": ["<array of strings>"],
-                        "description": "<string>",
-                        "expr": "<SQL expression>"
-                    }
-                ]
-            }
-        ]
-    }
+    stage_selector = st.selectbox("Select Stage", list_stages(database_selector, schema_selector))
     
     if 'yaml_structure' not in st.session_state:
-        st.session_state['yaml_structure'] = yaml_template
+        st.session_state['yaml_structure'] = copy.deepcopy(_YAML_TEMPLATE)
     
     # Add table to YAML structure
     if st.button("Add Table to YAML"):
         if len(st.session_state['tables']) < 100:
             st.session_state['tables'].append(table_selector)
 
-            table_definition_df = session.sql(f"DESCRIBE TABLE {database_selector}.{schema_selector}.{table_selector}").collect()
-            column_descriptions = session.create_dataframe(table_definition_df).to_pandas().to_dict('records')
-            columns = [row['name'] for row in table_definition_df]
-            data_types = [row['type'] for row in table_definition_df]
-            unique_columns = [row['unique key']=='Y' for row in column_descriptions]
-            ai_generated_column_descriptions = [generate_column_description(database_selector, schema_selector, table_selector, columns, column, column_description) for column, column_description in zip(columns, column_descriptions)]
-            sample_values = [min_max_column(database_selector, schema_selector, table_selector, column) for column in columns ]
+            table_definition_df = session.sql(f"DESCRIBE TABLE {database_selector}.{schema_selector}.{table_selector}").to_pandas()
+            column_descriptions = table_definition_df.to_dict('records')
+            # Serialize the column details once; both prompts embed the same JSON
+            column_details_json = json.dumps(column_descriptions, default=str)
+            columns = table_definition_df['name'].tolist()
+            data_types = table_definition_df['type'].tolist()
+            # Run the Cortex description call and the MIN/MAX query concurrently instead of sequentially
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                description_future = executor.submit(generate_all_column_descriptions, database_selector, schema_selector, table_selector, column_details_json)
+                sample_value_future = executor.submit(min_max_all, database_selector, schema_selector, table_selector, columns)
+                try:
+                    descriptions_by_column = description_future.result()
+                except (ValueError, KeyError, TypeError):
+                    st.warning("Could not parse the generated column descriptions; leaving them blank. Re-add the table to retry.")
+                    descriptions_by_column = {}
+                sample_values = sample_value_future.result()
+            ai_generated_column_descriptions = [descriptions_by_column.get(column, "") for column in columns]
 
             # Add table definition to YAML structure
             table_entry = {
                 "name": table_selector,
-                "description": generate_table_description(database_selector, schema_selector, table_selector, column_descriptions).replace('\n', ' ').replace('\r', ' '),
+                "description": generate_table_description(database_selector, schema_selector, table_selector, column_details_json).replace('\n', ' ').replace('\r', ' '),
                 "base_table": {
                     "database": database_selector,
                     "schema": schema_selector,
@@ -374,36 +435,46 @@ def show_table_definition_page():
                 "measures": []
             }
 
-            # Check for time dimensions, dimension columns, and measure columns
-            for column, data_type, column_description, unique_column, sample_value in zip(columns, data_types, ai_generated_column_descriptions, unique_columns, sample_values):
-                if data_type.upper() in ["DATE", "DATETIME", "TIME", "TIMESTAMP", "TIMESTAMP_LTZ(9)", "TIMESTAMP_NTZ", "TIMESTAMP_TZ"]:
-                    time_dimension_entry = {
-                        "name": column,
-                        "expr": column,
-                        "description": column_description,
-                  #      "unique": unique_column,
-                        "data_type": data_type.upper()
-                      #  "synonyms": ["<array of strings>"]
-                    }
-                    table_entry["time_dimensions"].append(time_dimension_entry)
-                if data_type.upper() in ["VARCHAR(50)", "VARCHAR(16777216)", "VARCHAR(1)", "VARCHAR(10)", "VARCHAR(20)", "VARCHAR(30)", "CHAR", "CHARACTER", "STRING", "TEXT", "BINARY", "VARBINARY"]:
-                    dimension_entry = {
-                        "name": column,
-                        "expr": column,
-                        "description": column_description,
-                        "data_type": data_type.upper(),
-                   #     "unique": unique_column,
-                    #    "synonyms": ["<array of strings>"]
-                    }
-                    table_entry["dimensions"].append(dimension_entry)
-                if data_type.upper() in ["NUMBER", "DECIMAL", "NUMERIC", "INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "BYTEINT", "FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "DOUBLE PRECISION", "REAL"]:
-                    measure_entry = {
-                        "name": column,
-                        "expr": column,
-                        "description": column_description,
-                        "data_type": data_type.upper(),
-                    }
-                    table_entry["measures"].append(measure_entry)
+            # Classify columns column-wise: parallel arrays, one boolean mask per
+            # section, then entries built from the masked arrays
+            names = np.asarray(columns, dtype=object)
+            data_types_upper = np.asarray([data_type.upper() for data_type in data_types], dtype=object)
+            descriptions = np.asarray(ai_generated_column_descriptions, dtype=object)
+            is_time = np.fromiter((data_type in TIME_DIMENSION_TYPES for data_type in data_types_upper), dtype=bool, count=len(names))
+            is_dimension = np.fromiter((data_type.startswith("VARCHAR") or data_type in DIMENSION_TYPES for data_type in data_types_upper), dtype=bool, count=len(names))
+            is_measure = np.fromiter((data_type in MEASURE_TYPES for data_type in data_types_upper), dtype=bool, count=len(names))
+
+            table_entry["time_dimensions"] = [
+                {
+                    "name": column,
+                    "expr": column,
+                    "description": column_description,
+              #      "unique": unique_column,
+                    "data_type": data_type
+                  #  "synonyms": ["<array of strings>"]
+                }
+                for column, data_type, column_description in zip(names[is_time], data_types_upper[is_time], descriptions[is_time])
+            ]
+            table_entry["dimensions"] = [
+                {
+                    "name": column,
+                    "expr": column,
+                    "description": column_description,
+                    "data_type": data_type,
+               #     "unique": unique_column,
+                #    "synonyms": ["<array of strings>"]
+                }
+                for column, data_type, column_description in zip(names[is_dimension], data_types_upper[is_dimension], descriptions[is_dimension])
+            ]
+            table_entry["measures"] = [
+                {
+                    "name": column,
+                    "expr": column,
+                    "description": column_description,
+                    "data_type": data_type,
+                }
+                for column, data_type, column_description in zip(names[is_measure], data_types_upper[is_measure], descriptions[is_measure])
+            ]
 
             if len(table_entry["dimensions"]) == 0:
                 del table_entry["dimensions"]
@@ -412,25 +483,28 @@ def show_table_definition_page():
             if len(table_entry["time_dimensions"]) == 0:
                 del table_entry["time_dimensions"]
             st.session_state['yaml_structure']['tables'].append(table_entry)
-            yaml_str = yaml.dump(st.session_state['yaml_structure'], sort_keys=False, indent=2, width=900)
+            yaml_str = yaml.dump(st.session_state['yaml_structure'], Dumper=_YAML_DUMPER, sort_keys=False, indent=2, width=900)
             st.session_state['yaml_str'] = yaml_str  # Save to session state
 
     # Display the updated YAML structure
-    st.code(st.session_state.get('yaml_str', yaml.dump(yaml_template, sort_keys=False, indent=2, width=900)), language='yaml')
-    
-    # Create a download button for the YAML file
-    yaml_bytes = io.BytesIO(st.session_state.get('yaml_str', '').encode('utf-8'))
+    st.code(st.session_state.get('yaml_str', _YAML_TEMPLATE_STR), language='yaml')
     
+    # Re-encode the YAML to bytes only when it has changed since the last rerun
+    yaml_str = st.session_state.get('yaml_str', '')
+    if st.session_state.get('yaml_bytes_source') != yaml_str:
+        st.session_state['yaml_bytes'] = yaml_str.encode('utf-8')
+        st.session_state['yaml_bytes_source'] = yaml_str
+
     st.download_button(
         label="Download YAML file",
-        data=yaml_bytes,
+        data=st.session_state['yaml_bytes'],
         file_name="semantic_model.yaml",
         mime="text/plain"
     )
-    
-    st.button('Upload to Stage',         
+
+    st.button('Upload to Stage',
               on_click = upload_to_stage,
-              args = [database_selector, schema_selector, yaml_bytes, stage_selector]
+              args = [database_selector, schema_selector, stage_selector]
              )
     
 # Function to reset the app
@@ -440,8 +514,7 @@ def reset_app():
     st.warning("Are you sure you want to reset the application? This will clear all saved data.")
     
     if st.button("Reset"):
-        for key in st.session_state.keys():
-            del st.session_state[key]
+        st.session_state.clear()
         st.experimental_set_query_params(page="Welcome")
         st.success("Application has been reset. Please go to the Welcome page.")
 
@@ -461,7 +534,8 @@ def main():
 
     st.sidebar.subheader("🔎 Navigation")
 
-    page = st.sidebar.radio("Go to", ["Welcome", "Getting Started", "Table Definition", 'Chat with Your Data',  "Reset"])
+    pages = ["Welcome", "Getting Started", "Table Definition", 'Chat with Your Data', "Reset"]
+    page = st.sidebar.radio("Go to", pages, index=pages.index(st.session_state.get('page', "Welcome")))
 
     if page == "Welcome":
         show_welcome_page()
@@ -477,9 +551,5 @@ def main():
     st.sidebar.markdown('''<hr>''', unsafe_allow_html=True)
     st.sidebar.caption("More documentation on [Cortex Analyst](https://docs.snowflake.com/en/user-guide/snowflake-cortex/cortex-analyst)")
 
-# Auto-navigation based on session state
-    if 'page' in st.session_state and st.session_state['page'] == "Table Definition":
-        show_table_definition_page()
-
 if __name__ == "__main__":
     main()
\ No newline at end of file